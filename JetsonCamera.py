@@ -3,15 +3,25 @@
 # Copyright (c) 2019 JetsonHacks
 
 import cv2
+import functools
 import threading
 import time
 import config
 
-try:
-    from Queue import Queue
-except ModuleNotFoundError:
-    from queue import Queue
+@functools.lru_cache(maxsize=None)
+def l4t_release():
+    """
+    Liest die L4T-Hauptversion aus /etc/nv_tegra_release
+    (z.B. 32 = JetPack 4 / Nano, 35+ = JetPack 5 / Orin). 0 = unbekannt.
+    """
+    try:
+        with open("/etc/nv_tegra_release") as f:
+            # Format: "# R35 (release), REVISION: 3.1, ..."
+            return int(f.readline().split()[1].lstrip("R"))
+    except (OSError, IndexError, ValueError):
+        return 0
 
+@functools.lru_cache(maxsize=None)
 def gstreamer_pipeline(
     capture_width=1920,
     capture_height=1080,
@@ -20,47 +30,66 @@ def gstreamer_pipeline(
     framerate=60,
     flip_method=0,
 ):
+    # Ab JetPack 5 (L4T R35) kann nvvidconv explizit auf die VIC-Hardware gelegt werden,
+    # statt die GPU zu belegen, die für die Inferenz gebraucht wird.
+    convert_options = f"flip-method={flip_method}"
+    if l4t_release() >= 35:
+        convert_options += " compute-hw=VIC"
+
     return (
         "nvarguscamerasrc sensor-id=0 exposurecompensation=-0.5 ! "
         # WICHTIG: Wir fordern jetzt 1920x1080 @ 60 FPS an
-        "video/x-raw(memory:NVMM), width=(int)%d, height=(int)%d, format=NV12, framerate=(fraction)%d/1 ! "
-        "nvvidconv flip-method=%d ! "
-        "video/x-raw, width=(int)%d, height=(int)%d, format=BGRx ! "
+        f"video/x-raw(memory:NVMM), width=(int){capture_width}, height=(int){capture_height}, "
+        f"format=NV12, framerate=(fraction){framerate}/1 ! "
+        # nvvidconv skaliert in Hardware (VIC) auf die Ausgabegröße
+        f"nvvidconv {convert_options} ! "
+        f"video/x-raw, width=(int){display_width}, height=(int){display_height}, format=BGRx ! "
         "videoconvert ! "
-        "video/x-raw, format=BGR ! appsink sync=false drop=true"
-        % (
-            capture_width,
-            capture_height,
-            framerate,
-            flip_method,
-            display_width,
-            display_height,
-        )
+        # max-buffers=1: Ohne Limit ist 'drop' wirkungslos und die appsink-Queue sammelt
+        # veraltete 1080p-Frames im Systemspeicher. So liegt immer nur der neueste Frame bereit.
+        "video/x-raw, format=BGR ! appsink sync=false max-buffers=1 drop=true"
     )
 
 class FrameReader(threading.Thread):
-    queues = []
     _running = True
     camera = None
     def __init__(self, camera, name):
         threading.Thread.__init__(self)
         self.name = name
         self.camera = camera
+        # Single-Slot-Austausch: Es wird nur der neueste Frame gehalten.
+        # Keine Queue pro Abruf, Konsumenten warten auf eine neue Frame-Nummer.
+        self._frame = None
+        self._frame_id = 0
+        self._waiters = 0 # Anzahl Konsumenten, die gerade auf einen Frame warten
+        self._cond = threading.Condition()
  
     def run(self):
         while self._running:
+            # Produce on Demand: Ohne wartenden Konsumenten wird nicht gelesen.
+            # Die appsink verwirft bis dahin selbst alte Frames (max-buffers=1).
+            with self._cond:
+                if not self._waiters:
+                    self._cond.wait(1.0 / config.CAM_FPS)
+                    continue
             _, frame = self.camera.read()
-            while self.queues:
-                queue = self.queues.pop()
-                queue.put(frame)
-    
-    def addQueue(self, queue):
-        self.queues.append(queue)
+            with self._cond:
+                self._frame = frame
+                self._frame_id += 1
+                self._cond.notify_all()
 
     def getFrame(self, timeout = None):
-        queue = Queue(1)
-        self.addQueue(queue)
-        return queue.get(timeout = timeout)
+        """Wartet auf den nächsten Frame. Liefert None, falls das Timeout abläuft."""
+        with self._cond:
+            last_id = self._frame_id
+            self._waiters += 1
+            self._cond.notify_all() # Produzenten wecken
+            try:
+                if not self._cond.wait_for(lambda: self._frame_id != last_id, timeout):
+                    return None
+                return self._frame
+            finally:
+                self._waiters -= 1
 
     def stop(self):
         self._running = False
@@ -91,15 +120,17 @@ class Camera(object):
     cap = None
     previewer = None
 
-    def __init__(self, width=1920, height=1080):
-        self.open_camera(width, height)
+    def __init__(self, width=1920, height=1080, display_width=None, display_height=None):
+        self.open_camera(width, height, display_width, display_height)
 
-    def open_camera(self, width=1920, height=1080):
+    def open_camera(self, width=1920, height=1080, display_width=None, display_height=None):
+        # display_* = Ausgabegröße. Die Skalierung erfolgt in Hardware (nvvidconv),
+        # nicht per cv2.resize auf der CPU.
         pipeline = gstreamer_pipeline(
             capture_width=width, 
             capture_height=height,
-            display_width=width, 
-            display_height=height,
+            display_width=display_width or width, 
+            display_height=display_height or height,
             framerate=config.CAM_FPS, # 60 FPS
             flip_method=0
         )
@@ -15,23 +15,57 @@ JSON_FILE = os.path.join(BASE_DIR, "detected_objects.json")
 # --- KI Modell ---
 # Nutzung von TensorRT (.engine) statt PyTorch (.pt) für 
 # massive Performance-Gewinne auf Nvidia Jetson Hardware.
-MODEL_PATH = os.path.join(BASE_DIR, "yolo11s.engine")
+# Präzision der Engine: "fp16" (Standard), "int8" (Kalibrierung nötig) oder "fp32".
+# Die Engine wird mit export_engine.py erzeugt.
+MODEL_PRECISION = "fp16"
+MODEL_PATH = os.path.join(BASE_DIR, f"yolo11s_{MODEL_PRECISION}.engine")
+MODEL_IMGSZ = 640 # Quadratische Eingangsgröße der Engine (muss zum Export passen)
 
 # --- Kamera-Einstellungen ---
 CAM_WIDTH = 1920
 CAM_HEIGHT = 1080
 CAM_FPS = 60 # Hohe Framerate, Buffer-Management geschieht in JetsonCamera.py
 
+# --- Arduino (Serielle Schnittstelle) ---
+SERIAL_PORT = '/dev/ttyACM0'
+SERIAL_BAUD = 115200     # Muss zum Arduino-Sketch passen (16 Byte Befehl: ~1.4ms statt ~17ms bei 9600)
+CMD_EPSILON = 0.02       # Befehl nur senden, wenn sich Gas/Lenkung um mehr als diesen Wert ändert
+CMD_KEEPALIVE = 0.5      # Sekunden: Unveränderten Befehl trotzdem periodisch wiederholen
+
 # --- Pre-Processing & Logik ---
 MEMORY_TOLERANCE = 10 # Hysterese: Wie viele Frames darf ein Objekt fehlen, bevor ID gelöscht wird?
-BORDER_MARGIN = 10
 SCALE_FACTOR = 0.8    # Inferenz auf kleinerem Bild spart Rechenzeit
+GUI_EVERY_N_FRAMES = 2 # Debug-Overlay nur jeden n-ten Frame zeichnen/anzeigen (60 FPS -> 30 Hz)
+
+# Die Skalierung übernimmt der Hardware-Scaler (nvvidconv/VIC) in der GStreamer-Pipeline.
+# Die Kamera liefert direkt Frames in Verarbeitungsauflösung, alle Pixelwerte
+# (Tracking, GUI, Regelung) beziehen sich auf diese Auflösung.
+PROC_WIDTH = int(CAM_WIDTH * SCALE_FACTOR)
+PROC_HEIGHT = int(CAM_HEIGHT * SCALE_FACTOR)
+
+# Kill-/Exit-Zone am Bildrand: 10px bei 1920px Bildbreite, umgerechnet auf die
+# Verarbeitungsauflösung (wie die Tracking-Radien). Ganzzahlig, da auch die GUI damit zeichnet.
+BORDER_MARGIN = round(10 * SCALE_FACTOR)
 
 # --- Tracking Algorithmus Tuning ---
 # Diese Werte definieren, wann ein Objekt als "dasselbe" wie im vorherigen Frame gilt.
-MAX_TRACKING_DISTANCE = 400 # Pixel-Radius für Frame-zu-Frame Matching
-RECOVERY_DISTANCE = 500     # Suchradius für Wiederfinden nach Verdeckung
+# Radien sind für 1920px Bildbreite getunt und werden auf die Verarbeitungsauflösung umgerechnet.
+MAX_TRACKING_DISTANCE = 400 * SCALE_FACTOR # Pixel-Radius für Frame-zu-Frame Matching
+RECOVERY_DISTANCE = 500 * SCALE_FACTOR     # Suchradius für Wiederfinden nach Verdeckung
+# Quadrierte Radien: Der Tracker vergleicht quadrierte Distanzen (spart die Wurzel)
+MAX_TRACKING_DISTANCE_SQ = MAX_TRACKING_DISTANCE ** 2
+RECOVERY_DISTANCE_SQ = RECOVERY_DISTANCE ** 2
 HISTORY_DURATION = 5.0      # Zeit in Sekunden für das "Gedächtnis" des Trackers
 
 # --- Inferenz Parameter ---
 CONFIDENCE_THRESHOLD = 0.8 # Nur sichere Erkennungen zulassen
+# Obergrenze für Detektionen pro Frame: begrenzt NMS und Post-Processing.
+# Mit einer Engine aus 'yolo export ... format=engine nms=True' läuft die NMS bereits
+# in TensorRT und das Post-Processing reduziert sich auf reines Slicing.
+MAX_DETECTIONS = 20
+
+# Batch-Inferenz: Mehrere Frames werden gesammelt und in EINEM Engine-Aufruf verarbeitet.
+# Amortisiert den Kernel-Launch-Overhead, kostet aber Latenz (Frames warten auf den Batch).
+# Werte > 1 erfordern eine Engine mit passendem (dynamischem) Batch-Profil.
+BATCH_SIZE = 1
+BATCH_TIMEOUT = 0.03 # Sekunden: Spätestens dann wird ein unvollständiger Batch verarbeitet
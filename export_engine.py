@@ -0,0 +1,70 @@
+# export_engine.py
+"""
+Export-Werkzeug für die TensorRT-Engine.
+
+Zweck
+-----
+Baut aus den PyTorch-Gewichten (.pt) die TensorRT-Engine, die main.py lädt
+(config.MODEL_PATH). Muss auf dem Jetson selbst laufen, da eine Engine an
+GPU-Architektur und TensorRT-Version gebunden ist.
+
+Präzision (config.MODEL_PRECISION)
+----------------------------------
+- fp16: Nutzt die Tensor Cores, etwa doppelter Durchsatz gegenüber fp32 bei
+  praktisch unveränderter Genauigkeit. Standard.
+- int8: Nochmals schneller und kleiner, braucht aber Kalibrierbilder
+  (--data: Ultralytics Dataset-YAML, idealerweise ~200 Bilder aus der echten Kamera).
+- fp32: Referenz ohne Quantisierung.
+
+Aufruf
+------
+    python3 export_engine.py --weights yolo11s.pt
+    python3 export_engine.py --weights yolo11s.pt --precision int8 --data calib.yaml
+"""
+
+import argparse
+import os
+import shutil
+from ultralytics import YOLO
+import config
+
+def parse_cmdline():
+    parser = argparse.ArgumentParser(description='TensorRT Engine Export')
+    parser.add_argument('-w', '--weights', default='yolo11s.pt', help='PyTorch Gewichte (.pt)')
+    parser.add_argument('-p', '--precision', default=config.MODEL_PRECISION, choices=['fp32', 'fp16', 'int8'])
+    parser.add_argument('-d', '--data', default=None, help='Dataset-YAML mit Kalibrierbildern (nur int8)')
+    parser.add_argument('--dla', type=int, default=None, help='DLA-Core nutzen (nur Orin, fp16/int8)')
+    parser.add_argument('--nms', action='store_true', help='NMS direkt in die Engine einbauen')
+    return parser.parse_args()
+
+def export(weights, precision, data=None, dla=None, nms=False):
+    """Exportiert die Engine als yolo11s_<precision>.engine neben config.py."""
+    if precision == 'int8' and data is None:
+        raise SystemExit("FEHLER: int8 braucht Kalibrierbilder (--data calib.yaml)")
+
+    options = {
+        'format': 'engine',
+        'imgsz': config.MODEL_IMGSZ,
+        'half': precision == 'fp16',
+        'int8': precision == 'int8',
+        'batch': config.BATCH_SIZE,
+        'dynamic': config.BATCH_SIZE > 1, # Batch-Profil nur wenn nötig (statisch ist schneller)
+        'workspace': 2,                   # GiB Builder-Workspace für die Taktik-Suche
+        'nms': nms,
+        'device': f"dla:{dla}" if dla is not None else 0,
+    }
+    if data is not None:
+        options['data'] = data
+
+    target = os.path.join(config.BASE_DIR, f"yolo11s_{precision}.engine")
+    print(f"--- EXPORT: {weights} -> {target} ({precision}) ---")
+    engine_path = YOLO(weights).export(**options)
+    shutil.move(engine_path, target)
+    print("Export fertig.")
+    if target != config.MODEL_PATH:
+        # main.py lädt config.MODEL_PATH, das an MODEL_PRECISION hängt
+        print(f"HINWEIS: Zum Laden in config.py MODEL_PRECISION = \"{precision}\" setzen.")
+
+if __name__ == "__main__":
+    args = parse_cmdline()
+    export(args.weights, args.precision, args.data, args.dla, args.nms)
@@ -13,57 +13,106 @@ Dient als Human-Machine-Interface (HMI) für Entwickler, um zu sehen:
 Design-Notizen
 --------------
 - Nutzt OpenCV (cv2) Zeichenfunktionen.
+- Statische Elemente (Exit Zone) werden nur einmal gerendert und danach pro Frame
+  nur noch maskiert in den Frame kopiert.
+- Texte laufen über text_cache (vorgerenderte Stempel statt Neu-Rasterung pro Frame).
+- Boxen werden pro Status gesammelt und mit einem einzigen cv2.polylines gezeichnet.
+- Die Anzeige (cv2.imshow) läuft in einem eigenen Thread (DisplayThread), damit der
+  GUI-Upload die Wahrnehmungs-Schleife nicht ausbremst.
 - Visuelles Feedback durch Farben:
   - Grün: Aktives Tracking (Objekt ist sichtbar).
   - Orange/Dünn: "Geister"-Objekt (gerade verloren/aus dem Gedächtnis).
 """
 
+import threading
 import cv2
+import numpy as np
 from config import BORDER_MARGIN
+from text_cache import put_text
 
-def draw_overlay(frame, width, height, active_entities):
+# Visuelle Kodierung des Status
+COLOR_ACTIVE = (0, 255, 0)  # Grün = Alles OK
+COLOR_GHOST = (0, 165, 255) # Orange = Warnung (Objekt aktuell unsichtbar)
+
+# Cache für das statische Overlay: {(height, width): [(roi_slices, stamp, mask), ...]}
+_static_overlay_cache = {}
+
+def _get_static_overlay(width, height):
+    """
+    Rendert Rahmen und Beschriftung der Exit Zone einmalig pro Auflösung.
+    Alles liegt in einem schmalen Streifen am Bildrand, daher werden nur die vier
+    Randstreifen (Bildausschnitt + Maske) gespeichert, nicht das ganze Bild.
+    """
+    key = (height, width)
+    cached = _static_overlay_cache.get(key)
+    if cached is None:
+        canvas = np.zeros((height, width, 3), np.uint8)
+        cv2.rectangle(canvas, 
+                      (BORDER_MARGIN, BORDER_MARGIN), 
+                      (width - BORDER_MARGIN, height - BORDER_MARGIN), 
+                      (0, 0, 255), 3) # Roter Rahmen
+        cv2.putText(canvas, "EXIT ZONE", (10, BORDER_MARGIN - 10), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+        band = BORDER_MARGIN + 3 # Rand + Linienstärke
+        regions = [
+            (slice(0, band), slice(0, width)),                        # oben (inkl. Text)
+            (slice(height - band, height), slice(0, width)),          # unten
+            (slice(band, height - band), slice(0, band)),             # links
+            (slice(band, height - band), slice(width - band, width)), # rechts
+        ]
+        cached = []
+        for roi in regions:
+            stamp = canvas[roi].copy()
+            mask = stamp.any(axis=2).astype(np.uint8) * 255
+            cached.append((roi, stamp, mask))
+        _static_overlay_cache[key] = cached
+    return cached
+
+def draw_overlay(frame, width, height, table):
     """
     Hauptfunktion zum Zeichnen des Overlays.
     Wird einmal pro Frame am Ende der Pipeline aufgerufen.
+
+    Args:
+        table: EntityTable des Trackers (Boxen/Status als Arrays).
     """
     
     # --- 1. Exit Zone (Kill Zone) visualisieren ---
     # Hilft dem User zu verstehen, warum ein Objekt am Rand "stirbt".
-    cv2.rectangle(frame, 
-                  (BORDER_MARGIN, BORDER_MARGIN), 
-                  (width - BORDER_MARGIN, height - BORDER_MARGIN), 
-                  (0, 0, 255), 3) # Roter Rahmen
-    cv2.putText(frame, "EXIT ZONE", (10, BORDER_MARGIN - 10), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+    for roi, stamp, mask in _get_static_overlay(width, height):
+        frame[roi] = cv2.copyTo(stamp, mask, frame[roi])
 
     # --- 2. Entitäten zeichnen ---
-    for entity in active_entities.values():
-        draw_entity(frame, entity)
+    # Erst alle Boxen (gebündelt), danach die Labels, damit Texte immer lesbar oben liegen.
+    active = table.active
+    draw_boxes(frame, table.boxes[active], COLOR_ACTIVE, 4)
+    draw_boxes(frame, table.boxes[~active], COLOR_GHOST, 2)
+    for entity in table.entities:
+        draw_label(frame, entity)
 
     # --- 3. HUD (Heads-Up Display) ---
     # Globale Statistiken oben links und unten links.
-    cv2.putText(frame, f"Objects: {len(active_entities)}", (30, 50), 
-                cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-    cv2.putText(frame, f"Res: {width}x{height}", (30, height - 30), 
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    put_text(frame, f"Objects: {len(table)}", (30, 50), 1.5, (0, 255, 0), 3)
+    put_text(frame, f"Res: {width}x{height}", (30, height - 30), 1, (255, 255, 255), 2)
 
-def draw_entity(frame, entity):
+def draw_boxes(frame, boxes, color, thickness):
+    """
+    Zeichnet alle Bounding Boxes einer Farbe mit EINEM cv2.polylines-Aufruf
+    (statt einem cv2.rectangle pro Objekt).
     """
-    Zeichnet Box und Label für ein einzelnes Objekt.
+    if not len(boxes): return
+    x, y, w, h = np.asarray(boxes, np.int32).reshape(-1, 4).T
+    polygons = np.stack([x, y, x + w, y, x + w, y + h, x, y + h], axis=1).reshape(-1, 4, 2)
+    cv2.polylines(frame, polygons, True, color, thickness)
+
+def draw_label(frame, entity):
+    """
+    Zeichnet das Label für ein einzelnes Objekt.
     Unterscheidet visuell zwischen "aktiv" und "verloren".
     """
-    x, y, w, h = entity.box
-    
-    # Visuelle Kodierung des Status
-    if entity.active:
-        color = (0, 255, 0) # Grün = Alles OK
-        thickness = 4
-    else:
-        color = (0, 165, 255) # Orange = Warnung (Objekt aktuell unsichtbar)
-        thickness = 2
-    
-    # Bounding Box
-    cv2.rectangle(frame, (x, y), (x + w, y + h), color, thickness)
+    x, y, _, _ = entity.box
+    color = COLOR_ACTIVE if entity.active else COLOR_GHOST
     
     # Label-Aufbau: "#1 Papierkugel (00:12)"
     text_line1 = f"#{entity.uid} {entity.label}"
@@ -74,9 +123,59 @@ def draw_entity(frame, entity):
 
     tx, ty = x, y - 10
     
-    # Text mit Outline (schwarzer Rand) für bessere Lesbarkeit auf hellem Hintergrund
-    cv2.putText(frame, text_line1, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 8) # Outline
-    cv2.putText(frame, text_line1, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)     # Text
-    
-    cv2.putText(frame, text_line2, (tx, ty - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 6)
-    cv2.putText(frame, text_line2, (tx, ty - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    # Text mit Outline (schwarzer Rand) für bessere Lesbarkeit auf hellem Hintergrund.
+    # Outline + Text liegen gemeinsam als ein Stempel im Cache (pro ID/Label/Status).
+    put_text(frame, text_line1, (tx, ty), 1, color, 2, outline=((0, 0, 0), 8))
+    put_text(frame, text_line2, (tx, ty - 35), 0.8, (255, 255, 255), 2, outline=((0, 0, 0), 6))
+
+# cv2.pollKey (ab OpenCV 4.5) kehrt sofort zurück, waitKey(1) schläft mindestens 1ms
+_poll_key = getattr(cv2, "pollKey", lambda: cv2.waitKey(1))
+
+class DisplayThread(threading.Thread):
+    """
+    Zeigt den jeweils neuesten annotierten Frame in einem eigenen Thread an.
+    Die Hauptschleife übergibt Frames per show() in einen Single-Slot: Ist die Anzeige
+    zu langsam, werden ältere Frames verworfen statt sich anzustauen.
+    Tastendrücke werden gepuffert und per poll_key() abgeholt.
+    """
+    def __init__(self, window_name, width=1280, height=720):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.window_name = window_name
+        self.size = (width, height)
+        self._frame = None
+        self._key = -1
+        self._running = True
+        self._cond = threading.Condition()
+
+    def run(self):
+        # Fenster im Anzeige-Thread erzeugen (GUI-Backends sind Thread-gebunden)
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(self.window_name, *self.size)
+        while self._running:
+            with self._cond:
+                self._cond.wait_for(lambda: self._frame is not None or not self._running, timeout=0.03)
+                frame, self._frame = self._frame, None
+            if frame is not None:
+                cv2.imshow(self.window_name, frame)
+            key = _poll_key() & 0xFF # Pumpt auch die GUI-Events, wenn kein neuer Frame kam
+            if key != 0xFF:
+                self._key = key
+        cv2.destroyWindow(self.window_name)
+
+    def show(self, frame):
+        """Übergibt einen Frame zur Anzeige (überschreibt einen noch nicht angezeigten)."""
+        with self._cond:
+            self._frame = frame
+            self._cond.notify()
+
+    def poll_key(self):
+        """Liefert den zuletzt gedrückten Key (oder -1) und setzt ihn zurück."""
+        key, self._key = self._key, -1
+        return key
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.join(timeout=1.0)
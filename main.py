@@ -24,6 +24,7 @@ Design-Notizen
 
 import time
 import signal
+from collections import deque
 import cv2
 import argparse
 import serial 
@@ -31,7 +32,8 @@ import serial
 # Eigene Module (Architektur-Schichten)
 import config
 from tracker_logic import ObjectManager
-from gui import draw_overlay
+from gui import draw_overlay, DisplayThread
+from text_cache import put_text
 from yolo_detector import YoloDetector
 from robot_brain import RobotBrain 
 
@@ -72,7 +74,9 @@ def main():
     
     # ---------- 1. Hardware-Schicht Initialisierung ----------
     # Kamera-Instanz erstellen (Buffer-Handling passiert intern)
-    camera = Camera(width=config.CAM_WIDTH, height=config.CAM_HEIGHT)
+    # Liefert bereits in Hardware herunterskalierte Frames (Verarbeitungsauflösung)
+    camera = Camera(width=config.CAM_WIDTH, height=config.CAM_HEIGHT,
+                    display_width=config.PROC_WIDTH, display_height=config.PROC_HEIGHT)
     
     # Fokus-Motor initialisieren (Arducam I2C Steuerung)
     focuser = Focuser(args.i2c_bus)
@@ -86,8 +90,9 @@ def main():
     # Mikrocontroller-Kommunikation (Arduino Uno/Nano via USB)
     print("Verbinde mit Arduino...")
     try:
-        # Timeout ist wichtig, damit read() nicht blockiert
-        arduino = serial.Serial('/dev/ttyACM0', 9600, timeout=0.1)
+        # Timeout ist wichtig, damit read() nicht blockiert.
+        # write_timeout=0: write() blockiert nie (Regelschleife darf nicht auf die UART warten)
+        arduino = serial.Serial(config.SERIAL_PORT, config.SERIAL_BAUD, timeout=0.1, write_timeout=0)
         time.sleep(2) # Warten auf Arduino-Auto-Reset nach Serial-Open
         print("Arduino verbunden!")
     except Exception as e:
@@ -99,15 +104,34 @@ def main():
     tracker = ObjectManager(config.JSON_FILE)    # Verwaltet Objekt-Identitäten über Frames hinweg
     brain = RobotBrain(wait_time=2.0, search_duration=10.0) # Entscheidungslogik (Regelkreis)
 
-    # Fenster für Debug-Visualisierung
-    cv2.namedWindow("Tracking", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("Tracking", 1280, 720)
+    # Fenster für Debug-Visualisierung (eigener Thread, blockiert die Hauptschleife nicht)
+    display = DisplayThread("Tracking", 1280, 720)
+    display.start()
 
     # Initialer Fokus
     focuser.set(Focuser.OPT_FOCUS, 2000) 
     
     # Timer-Variablen für asynchrone Aufgaben
-    last_focus_time = time.time()
+    # Monotone Uhr in Nanosekunden: keine Sprünge durch NTP, reine Integer-Vergleiche
+    last_focus_ns = time.monotonic_ns()
+
+    # Zuletzt gesendeter Motorbefehl (throttle, steering) und Sendezeitpunkt
+    last_cmd = None
+    last_cmd_ns = 0
+
+    # Batch-Puffer für die Inferenz
+    batch = deque(maxlen=config.BATCH_SIZE)
+    batch_start_ns = 0
+
+    # Konstanten der Hauptschleife einmalig als lokale Variablen binden
+    # (spart das Modul-Attribut-Lookup in jeder Iteration)
+    batch_size = config.BATCH_SIZE
+    batch_timeout_ns = int(config.BATCH_TIMEOUT * 1e9)
+    cmd_epsilon = config.CMD_EPSILON
+    cmd_keepalive_ns = int(config.CMD_KEEPALIVE * 1e9)
+    focus_interval_ns = 1_000_000_000 # Autofokus höchstens 1x pro Sekunde
+    gui_every = config.GUI_EVERY_N_FRAMES
+    frame_idx = 0
 
     # ========== Hauptschleife (Main Loop) ==========
     while not exit_:
@@ -118,62 +142,68 @@ def main():
         height, width = frame.shape[:2]
         
         # 2. Perzeption (Wahrnehmung)
-        # Downscaling erhöht die Inferenz-Geschwindigkeit drastisch
-        small_frame = cv2.resize(frame, (0, 0), fx=config.SCALE_FACTOR, fy=config.SCALE_FACTOR)
-        detections = detector.detect(small_frame)
+        # Das Downscaling ist bereits in der Kamera-Pipeline (nvvidconv) passiert.
+        # Frames sammeln, bis der Batch voll ist (oder das Timeout abläuft)
+        now_ns = time.monotonic_ns() # Einmal pro Iteration, gilt für alle Timer unten
+        if not batch: batch_start_ns = now_ns
+        batch.append(frame)
+        if len(batch) < batch_size and now_ns - batch_start_ns < batch_timeout_ns:
+            continue
+
+        # Ein einziger Engine-Aufruf für alle gesammelten Frames
+        batch_detections = detector.detect_batch(list(batch))
         
-        # Koordinaten-Transformation: Bounding-Boxen zurück auf Originalgröße skalieren
-        inv_scale = 1.0 / config.SCALE_FACTOR
-        scaled_detections = []
-        for det in detections:
-            x, y, w, h = det['box']
-            scaled_detections.append({
-                'label': det['label'],
-                'box': (int(x*inv_scale), int(y*inv_scale), int(w*inv_scale), int(h*inv_scale))
-            })
-
-        # 3. Objekt-Tracking (Zuordnung von IDs zu Boxen)
-        active_entities = tracker.process(scaled_detections, width, height)
-        
-        # 4. Zielauswahl (Heuristik: Größtes Objekt = Nächstes Objekt)
-        target_entity = None
-        max_area = 0
-        for uid, entity in active_entities.items():
-            if entity.active:
-                area = entity.box[2] * entity.box[3]
-                if area > max_area:
-                    max_area = area
-                    target_entity = entity
+        for boxes, labels, _ in batch_detections:
+            # 3. Objekt-Tracking (Zuordnung von IDs zu Boxen)
+            # Jeder Frame des Batches durchläuft den Tracker in zeitlicher Reihenfolge.
+            # Die Boxen sind Sichten auf die Detektor-Puffer, der Tracker übernimmt sie als Kopie.
+            # 4. Zielauswahl (größtes sichtbares Objekt) passiert im selben Tracker-Durchlauf
+            entity_table, target_entity = tracker.process(boxes, labels, width, height)
+        batch.clear()
+        # Ab hier wird nur noch der neueste Frame (letzter im Batch) weiterverarbeitet
 
         # 5. Handlungsplanung (RobotBrain)
         # Berechnet Lenkwinkel und Gas basierend auf Position im Bild
         throttle, steering, status_text, color = brain.calculate_move(target_entity, width)
 
         # 6. Aktorik (Ausführung)
-        if arduino:
+        # Nur bei relevanter Änderung senden (plus periodischer Keepalive)
+        cmd_changed = (last_cmd is None
+                       or abs(throttle - last_cmd[0]) > cmd_epsilon
+                       or abs(steering - last_cmd[1]) > cmd_epsilon)
+        if arduino and (cmd_changed or now_ns - last_cmd_ns > cmd_keepalive_ns):
             try:
-                # Protokoll: <GAS, LENKUNG> als String
-                cmd = f"<{throttle:.2f},{steering:.2f}>\n"
-                arduino.write(cmd.encode())
+                # Sendepuffer noch belegt -> Befehl verwerfen statt zu blockieren.
+                # last_cmd bleibt dann alt, der Befehl wird im nächsten Frame erneut versucht.
+                if arduino.out_waiting == 0:
+                    # Protokoll: <GAS, LENKUNG> als String
+                    cmd = f"<{throttle:.2f},{steering:.2f}>\n"
+                    arduino.write(cmd.encode())
+                    last_cmd = (throttle, steering)
+                    last_cmd_ns = now_ns
             except Exception as e: pass
 
         # 7. Wartungsprozesse (Autofokus)
         # Wird nur periodisch (1Hz) getriggert, um den Main-Loop nicht zu bremsen
-        if time.time() - last_focus_time > 1.0: 
+        if now_ns - last_focus_ns > focus_interval_ns: 
             if focusState.isFinish(): 
                 focusState.reset()
                 doFocus(camera, focuser, focusState)
-                last_focus_time = time.time()
+                last_focus_ns = now_ns
 
         # 8. Visualisierung (GUI Update)
-        draw_overlay(frame, width, height, active_entities)
-        cv2.putText(frame, f"Mode: {status_text}", (30, 150), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        cv2.putText(frame, f"CMD: T={throttle:.2f} S={steering:.2f}", (30, 190), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-
-        cv2.imshow("Tracking", frame)
+        # Nur jeden n-ten Frame: Für die Debug-Ansicht reichen 30 Hz
+        frame_idx += 1
+        if frame_idx % gui_every == 0:
+            draw_overlay(frame, width, height, entity_table)
+            put_text(frame, f"Mode: {status_text}", (30, 150), 1, color, 2)
+            # Regler-Werte ändern sich fast jeden Frame -> direkt zeichnen (Text-Cache würde nur verfehlen)
+            cv2.putText(frame, f"CMD: T={throttle:.2f} S={steering:.2f}", (30, 190),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+            display.show(frame)
         
         # User Input Handling
-        key = cv2.waitKey(1) & 0xFF
+        key = display.poll_key()
         if key == ord('q'): break
         elif key == ord('f'): # Manueller Fokus-Trigger
             focusState.reset()
@@ -181,6 +211,7 @@ def main():
 
     # Aufräumen (Resource Cleanup)
     if arduino: arduino.close()
+    display.stop()
     camera.close()
     cv2.destroyAllWindows()
 
@@ -20,7 +20,7 @@ import time
 
 # Port-Konfiguration
 PORT = '/dev/ttyACM0'
-BAUD = 9600
+BAUD = 115200 # Muss zum Arduino-Sketch passen (siehe config.SERIAL_BAUD)
 
 def send_command(arduino, throttle, steering):
     """
@@ -8,8 +8,9 @@ Zweck
 physikalische Steuerbefehle (Gas/Lenkung) für die Motorsteuerung.
 
 Algorithmus:
-- Lenkung: Proportional-Regler (P-Controller). Versucht, den Fehler 
-  (Abstand Objektmitte zu Bildmitte) zu minimieren.
+- Lenkung: PID-Regler. Versucht, den Fehler (Abstand Objektmitte zu Bildmitte)
+  zu minimieren. Der I-Anteil beseitigt bleibende Abweichungen, der D-Anteil ist
+  tiefpassgefiltert (Rauschen der Bounding Box), Anti-Windup per Back-Calculation.
 - Gas: Einfache Zustandslogik (Bang-Bang Controller mit Hysterese-Ansatz). 
   Stoppt, wenn das Objekt groß genug erscheint (nah genug).
 """
@@ -24,14 +25,76 @@ class RobotBrain:
         
         # State-Variablen
         self.has_seen_object_once = False
-        self.last_detection_time = time.time()
+        self.last_detection_ns = time.monotonic_ns() # Monotone Uhr (sprungfrei, Integer)
         
         # Tuning-Parameter (Regler-Gains)
-        self.STEERING_GAIN = 0.6       # Wie stark lenkt er bei Abweichung?
+        self.STEERING_GAIN = 0.6       # Kp: Wie stark lenkt er bei Abweichung?
+        self.STEERING_KI = 0.1         # Ki: Baut bleibende Abweichungen ab (pro Sekunde)
+        self.STEERING_KD = 0.05        # Kd: Dämpft schnelle Fehleränderungen
+        self.DERIV_FILTER_N = 20       # Tiefpass des D-Anteils (Grenzfrequenz ~ N / Td)
+        self.STEERING_MAX = 1.0        # Stellgrößen-Begrenzung (Sättigung)
+        self.DT_DEFAULT = 1.0 / 30     # Angenommene Schrittweite für den ersten Regelschritt
         self.TARGET_WIDTH_RATIO = 0.4  # Zielgröße: Wenn Objekt 40% der Bildbreite einnimmt -> Stopp
         self.SPEED_APPROACH = 0.65     # Geschwindigkeit beim Verfolgen
         self.SPEED_SEARCH = 0.4        # Geschwindigkeit (theoretisch) beim Suchen
 
+        # Bildgeometrie (Konstanten pro Bildbreite, siehe set_frame_geometry)
+        self._frame_width = None
+
+        # PID-Zustand der Lenkung
+        self.reset_steering()
+
+    def reset_steering(self):
+        """Setzt den Lenkregler zurück (z.B. wenn das Ziel verloren ging)."""
+        self._i_acc = 0.0     # Integrator
+        self._d_prev = 0.0    # Gefilterter D-Anteil des letzten Schritts
+        self._last_err = None
+        self._last_ns = None
+        self._target_uid = None # Ziel, zu dem der Reglerzustand gehört
+
+    def _steering_pid(self, err, now_ns):
+        """
+        Ein Schritt des Lenk-PID (diskret, Rückwärts-Differenz).
+
+        D-Anteil mit Tiefpass 1. Ordnung (Td = Kd/Kp):
+            D = Td/(Td + N*dt) * D_prev + Kp*Td*N/(Td + N*dt) * (err - err_prev)
+        Anti-Windup: Bei Sättigung wird der Überschuss vom Integrator abgezogen (Back-Calculation),
+        höchstens bis 0. So kann eine kurze D-Spitze den Integrator nicht umpolen.
+        """
+        kp, ki, kd, n = self.STEERING_GAIN, self.STEERING_KI, self.STEERING_KD, self.DERIV_FILTER_N
+        # dt als Integer-Differenz in ns, erst danach in Sekunden umrechnen (keine Rundungsfehler)
+        dt = (now_ns - self._last_ns) * 1e-9 if self._last_ns is not None else self.DT_DEFAULT
+        if dt <= 0: dt = self.DT_DEFAULT
+
+        p = kp * err
+        self._i_acc += ki * err * dt
+        if self._last_err is None or kd == 0:
+            d = 0.0
+        else:
+            a = kd / (kd + n * kp * dt)
+            d = a * self._d_prev + a * kp * n * (err - self._last_err)
+
+        u = p + self._i_acc + d
+        u_sat = min(max(u, -self.STEERING_MAX), self.STEERING_MAX)
+        if u != u_sat:
+            lo, hi = sorted((0.0, self._i_acc))
+            self._i_acc = min(max(self._i_acc - (u - u_sat), lo), hi)
+
+        self._d_prev = d
+        self._last_err = err
+        self._last_ns = now_ns
+        return u_sat
+
+    def set_frame_geometry(self, frame_width):
+        """
+        Berechnet die Normierungskonstanten einmalig pro Bildbreite.
+        So entfallen die Divisionen im Regelkreis (Multiplikation mit dem Kehrwert).
+        """
+        self._frame_width = frame_width
+        self._half_w = frame_width * 0.5    # Bildmitte
+        self._inv_half_w = 2.0 / frame_width
+        self._inv_w = 1.0 / frame_width
+
     def calculate_move(self, target_entity, frame_width):
         """
         Haupt-Berechnungsfunktion.
@@ -48,21 +111,28 @@ class RobotBrain:
         status_text = "IDLE"
         color = (0, 0, 255) # Rot (Standard: Stop)
 
+        if frame_width != self._frame_width:
+            self.set_frame_geometry(frame_width) # Nur bei geänderter Auflösung
+
         if target_entity:
             # --- ZUSTAND: TRACKING (Objekt sichtbar) ---
+            # Zielwechsel: I-/D-Anteil des alten Ziels verwerfen (Fehlersprung würde sonst den D-Anteil auslösen)
+            if target_entity.uid != self._target_uid:
+                self.reset_steering()
+                self._target_uid = target_entity.uid
+            x, _, w, _ = target_entity.box
             
             # 1. Lenk-Regelung (Lateral Control)
             # Ziel ist es, error_x auf 0 zu bringen.
-            center_x = frame_width / 2
-            obj_x = target_entity.box[0] + (target_entity.box[2] / 2)
+            obj_x = x + w * 0.5
             
             # Normalisierter Fehler (-1.0 = ganz links, +1.0 = ganz rechts)
-            error_x = (obj_x - center_x) / (frame_width / 2)
-            steering = error_x * self.STEERING_GAIN
+            error_x = (obj_x - self._half_w) * self._inv_half_w
+            steering = self._steering_pid(error_x, time.monotonic_ns())
 
             # 2. Geschwindigkeits-Regelung (Longitudinal Control)
             # Wir nutzen die Breite der Bounding Box als Proxy für die Entfernung.
-            current_width_ratio = target_entity.box[2] / frame_width
+            current_width_ratio = w * self._inv_w
             
             if current_width_ratio < self.TARGET_WIDTH_RATIO:
                 # Objekt ist klein -> wir sind weit weg -> Fahren
@@ -77,6 +147,8 @@ class RobotBrain:
         else:
             # --- ZUSTAND: VERLOREN / STOP ---
             # Failsafe-Modus: Wenn kein Ziel da ist, bleiben wir sofort stehen.
+            # Regler zurücksetzen, damit beim nächsten Ziel kein alter I-/D-Anteil nachwirkt.
+            self.reset_steering()
             throttle = 0.0
             steering = 0.0
             status_text = "NO TARGET - STOPPED"
@@ -0,0 +1,87 @@
+# text_cache.py
+"""
+Text-Cache für das Overlay (HUD & Labels).
+
+Zweck
+-----
+cv2.putText rastert die Hershey-Vektorschrift bei jedem Aufruf neu. Die meisten
+Overlay-Texte ("Objects: 3", "Mode: TRACKING", "#1 bottle") ändern sich aber nur
+selten. Dieses Modul rendert jeden Text einmalig in einen kleinen Stempel
+(Farbbild + Maske) und kopiert ihn danach nur noch maskiert in den Frame.
+
+Design-Notizen
+--------------
+- Ganze Texte statt einzelner Glyphen: Ein Stempel = ein cv2.copyTo-Aufruf.
+  Zeichenweises Kopieren wäre schon bei kurzen Texten langsamer als putText selbst.
+- Der Cache ist begrenzt (LRU): Oft genutzte Stempel (HUD, Labels) bleiben erhalten,
+  selten genutzte werden verdrängt.
+- Texte, die sich fast jeden Frame ändern (z.B. Regler-Werte), gehören NICHT in den
+  Cache: Jeder Aufruf wäre ein Miss und teurer als cv2.putText. Diese direkt zeichnen.
+- Text mit Outline (dicker schwarzer Rand + farbige Schrift) wird als EIN Stempel
+  gecacht, statt zweimal übereinander gezeichnet zu werden.
+- Die Ausgabe ist pixelgleich zu cv2.putText (gleiche Schrift, Linienart LINE_8).
+"""
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+LINE_TYPE = cv2.LINE_8 # Standard von putText (OpenCV 4.x), liefert eine binäre Maske
+MAX_ENTRIES = 256 # Maximale Anzahl gecachter Text-Stempel
+
+# {(text, scale, color, thickness, outline): (stamp, mask, (offset_x, offset_y))}
+_cache = {} # Einfüge-Reihenfolge = LRU-Reihenfolge (ältester Zugriff vorne)
+
+def render_text(text, scale, color, thickness, outline=None):
+    """
+    Liefert den (gecachten) Stempel für einen Text.
+    Der Offset gibt an, wo der putText-Ursprung (Grundlinie links) im Stempel liegt.
+
+    Args:
+        outline: Optional (outline_color, outline_thickness). Entspricht einem
+                 putText mit diesen Werten VOR dem eigentlichen Text.
+    """
+    key = (text, scale, color, thickness, outline)
+    entry = _cache.pop(key, None)
+    if entry is not None:
+        _cache[key] = entry # Treffer ans Ende (zuletzt benutzt)
+    else:
+        max_thickness = max(thickness, outline[1]) if outline else thickness
+        (w, h), baseline = cv2.getTextSize(text, FONT, scale, max_thickness)
+        pad = max_thickness # Puffer für Linienstärke und Überhänge der Glyphen
+        offset = (pad, pad + h)
+
+        mask = np.zeros((h + baseline + 2 * pad, w + 2 * pad), np.uint8)
+        cv2.putText(mask, text, offset, FONT, scale, 255, thickness, LINE_TYPE)
+        stamp = np.empty(mask.shape + (3,), np.uint8)
+        stamp[:] = color
+
+        if outline:
+            outline_color, outline_thickness = outline
+            outline_mask = np.zeros_like(mask)
+            cv2.putText(outline_mask, text, offset, FONT, scale, 255, outline_thickness, LINE_TYPE)
+            stamp[(outline_mask > 0) & (mask == 0)] = outline_color
+            mask |= outline_mask
+
+        if len(_cache) >= MAX_ENTRIES:
+            _cache.pop(next(iter(_cache))) # Am längsten unbenutzten Eintrag verwerfen
+        entry = (stamp, mask, offset)
+        _cache[key] = entry
+    return entry
+
+def put_text(frame, text, org, scale, color, thickness, outline=None):
+    """Ersatz für cv2.putText(frame, text, org, FONT_HERSHEY_SIMPLEX, scale, color, thickness, LINE_8)."""
+    stamp, mask, (off_x, off_y) = render_text(text, scale, color, thickness, outline)
+    x0, y0 = org[0] - off_x, org[1] - off_y
+    h, w = mask.shape
+
+    # Clipping am Bildrand (Labels über Objekten ragen oft aus dem Bild)
+    frame_h, frame_w = frame.shape[:2]
+    fx0, fy0 = max(x0, 0), max(y0, 0)
+    fx1, fy1 = min(x0 + w, frame_w), min(y0 + h, frame_h)
+    if fx0 >= fx1 or fy0 >= fy1:
+        return
+
+    src = (slice(fy0 - y0, fy1 - y0), slice(fx0 - x0, fx1 - x0))
+    roi = (slice(fy0, fy1), slice(fx0, fx1))
+    frame[roi] = cv2.copyTo(stamp[src], mask[src], frame[roi])
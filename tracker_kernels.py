@@ -0,0 +1,90 @@
+# tracker_kernels.py
+"""
+Native Kernels für den Tracker (optional mit Numba).
+
+Zweck
+-----
+Die Distanzmatrix des Trackers ist bereits mit NumPy vektorisiert. Übrig bleibt die
+Greedy-Zuordnung, die Paar für Paar prüft, ob Objekt/Detektion schon vergeben sind.
+Dieser Schritt wird hier als Schleifen-Kernel formuliert und mit Numba zu
+Maschinencode kompiliert.
+
+Design-Notizen
+--------------
+- Numba ist optional: Ohne Numba ist `njit` ein Dekorator ohne Wirkung und
+  HAVE_NUMBA = False. Der Tracker nutzt dann seinen NumPy-Greedy-Pfad.
+- cache=True legt den kompilierten Code auf der Disk ab, damit der JIT-Lauf
+  nicht bei jedem Start anfällt (nur der allererste Aufruf ist langsam).
+- Insertion-Sort statt np.argsort: Die Anzahl Kandidaten ist winzig (wenige Dutzend),
+  und der Sort ist stabil (gleiche Reihenfolge bei gleicher Distanz wie der NumPy-Pfad).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Ersatz-Dekorator ohne Numba: Funktion bleibt reines Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True, fastmath=True)
+def greedy_match(dist2, valid):
+    """
+    Greedy-Zuordnung: Kürzeste erlaubte Distanz zuerst, jede Zeile/Spalte höchstens einmal.
+
+    Args:
+        dist2: (N,M) quadrierte Distanzen (Objekte x Detektionen).
+        valid: (N,M) bool, erlaubte Paare (gleiches Label, innerhalb des Radius).
+
+    Returns:
+        np.int32 (K,2) mit (row, col)-Paaren in Zuordnungsreihenfolge.
+    """
+    n, m = dist2.shape
+
+    # Kandidaten einsammeln (zeilenweise)
+    cand_d = np.empty(n * m, np.float64)
+    cand_r = np.empty(n * m, np.int32)
+    cand_c = np.empty(n * m, np.int32)
+    k = 0
+    for r in range(n):
+        for c in range(m):
+            if valid[r, c]:
+                cand_d[k] = dist2[r, c]
+                cand_r[k] = r
+                cand_c[k] = c
+                k += 1
+
+    # Stabiler Insertion-Sort nach Distanz
+    for i in range(1, k):
+        d, r, c = cand_d[i], cand_r[i], cand_c[i]
+        j = i - 1
+        while j >= 0 and cand_d[j] > d:
+            cand_d[j + 1] = cand_d[j]
+            cand_r[j + 1] = cand_r[j]
+            cand_c[j + 1] = cand_c[j]
+            j -= 1
+        cand_d[j + 1] = d
+        cand_r[j + 1] = r
+        cand_c[j + 1] = c
+
+    # Zuweisung: Zeilen/Spalten über zwei Masken sperren
+    row_used = np.zeros(n, np.bool_)
+    col_used = np.zeros(m, np.bool_)
+    pairs = np.empty((min(n, m), 2), np.int32)
+    p = 0
+    for i in range(k):
+        r, c = cand_r[i], cand_c[i]
+        if row_used[r] or col_used[c]:
+            continue # Dieses Paar ist schon vergeben
+        row_used[r] = True
+        col_used[c] = True
+        pairs[p, 0] = r
+        pairs[p, 1] = c
+        p += 1
+    return pairs[:p]
@@ -10,8 +10,10 @@ dass ein Objekt über die Zeit hinweg eine feste ID behält.
 
 Kern-Algorithmus (Centroid Tracking):
 1.  Berechnung der euklidischen Distanzen zwischen allen bekannten Objekten (aus Frame t-1)
-    und neuen Detektionen (aus Frame t).
-2.  Greedy-Matching: Die kürzesten Distanzen werden zuerst verknüpft.
+    und neuen Detektionen (aus Frame t) als NumPy-Matrix (ohne Python-Doppelschleife).
+2.  Zuordnung: Ungarischer Algorithmus (scipy, global minimale Gesamtdistanz).
+    Ohne scipy Greedy-Matching: Die kürzesten Distanzen werden zuerst verknüpft
+    (mit Numba als nativer Kernel, siehe tracker_kernels.py).
 3.  Lebenszyklus-Management:
     - NEW: Keine passende alte ID gefunden -> Neue ID vergeben.
     - UPDATE: Passende ID gefunden -> Position aktualisieren.
@@ -22,44 +24,115 @@ Design-Notizen
 --------------
 - I/O-Optimierung: Das Schreiben in die JSON-Logdatei ist gedrosselt (Buffer), 
   um die Framerate des Roboters nicht durch Festplattenzugriffe zu bremsen.
+  Geschrieben wird nur, wenn sich der exportierte Zustand (IDs, Status, Dauer) geändert hat.
+  Die Disk-Zugriffe selbst laufen in einem Hintergrund-Thread (SD-Karte kann Latenz-Spitzen haben).
 - Heuristik "Kill Zone": Objekte, die den Bildrand berühren, werden sofort gelöscht,
   da Tracking am Rand unzuverlässig ist (Objekt nur halb sichtbar).
+- Zustand als EntityTable (Structure of Arrays): Boxen, Status und Labels liegen als
+  zusammenhängende NumPy-Arrays vor und werden inkrementell gepflegt. Matching, GUI und
+  Zielauswahl arbeiten direkt darauf, ohne pro Frame über die Objekte zu iterieren.
 """
 
+import heapq
 import json
 import time
-import math
 import os
+import queue
+import threading
 from datetime import datetime
-from config import MEMORY_TOLERANCE, BORDER_MARGIN, MAX_TRACKING_DISTANCE, HISTORY_DURATION, RECOVERY_DISTANCE
+import numpy as np
+from tracker_kernels import HAVE_NUMBA, greedy_match
+from config import (MEMORY_TOLERANCE, BORDER_MARGIN, MAX_TRACKING_DISTANCE_SQ, HISTORY_DURATION,
+                    RECOVERY_DISTANCE, RECOVERY_DISTANCE_SQ)
+
+# Optional: Ungarischer Algorithmus und KD-Baum aus scipy (C-Implementierung).
+# Ohne scipy läuft der Tracker mit Greedy-Matching und linearer History-Suche weiter.
+try:
+    from scipy.optimize import linear_sum_assignment
+    from scipy.spatial import cKDTree
+except ImportError:
+    linear_sum_assignment = None
+    cKDTree = None
+
+GATED_COST = 1e9 # Kosten für verbotene Paare (anderes Label / zu weit entfernt)
+KDTREE_MIN_BUCKET = 8 # Ab dieser History-Größe pro Label lohnt sich ein KD-Baum
+
+def match_pairs(dist2, valid):
+    """
+    Ordnet Zeilen (Objekte) und Spalten (Detektionen) einander zu.
+    Nur Paare mit valid[row, col] == True sind erlaubt.
+
+    Returns:
+        Liste von (row, col)-Paaren.
+    """
+    if linear_sum_assignment is not None:
+        # Global optimale Zuordnung: Vermeidet ID-Tausch bei sich kreuzenden Objekten
+        cost = np.where(valid, dist2, GATED_COST)
+        rows, cols = linear_sum_assignment(cost)
+        keep = valid[rows, cols] # Verbotene Paare, die nur "aufgefüllt" wurden, verwerfen
+        return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+    # Fallback Greedy: Sortieren nach kleinster Distanz. Das naheliegendste Match gewinnt.
+    if HAVE_NUMBA:
+        return greedy_match(dist2, valid).tolist()
+    pairs = np.argwhere(valid) # Zeilenweise, gleiche Reihenfolge wie dist2[valid]
+    order = np.argsort(dist2[valid], kind='stable')
+    matched_rows, matched_cols, result = set(), set(), []
+    for row, col in pairs[order].tolist():
+        if row in matched_rows or col in matched_cols:
+            continue # Dieses Paar ist schon vergeben
+        matched_rows.add(row)
+        matched_cols.add(col)
+        result.append((row, col))
+    return result
 
 class TrackedObject:
     """
     Datencontainer für ein einzelnes Objekt.
     Speichert den Zustand (Position, ID, Zeitstempel, Status).
     """
-    def __init__(self, uid, label, box, original_start_time=None):
+    def __init__(self, uid, label, box, now_ns, origin=None):
         self.uid = uid
         self.label = label
         self.box = box # Format: (x, y, w, h)
+        self.centroid = self._centroid(box) # Mittelpunkt, für die Distanzmatrix gecacht
         
-        # Zeitstempel für Statistiken
-        if original_start_time:
-            self.start_time = original_start_time
+        # Zeitstempel für Statistiken (now_ns = Frame-Zeit aus ObjectManager.process)
+        # Intern monotone Uhr in ns (sprungfrei, Integer). Die Wanduhr (start_time) wird
+        # nur für die Anzeige der Startzeit (first_seen_str) gebraucht.
+        # origin: Vorheriges Objekt gleicher ID (Wiederbelebung) -> Startzeit übernehmen.
+        if origin is not None:
+            self.start_time = origin.start_time
+            self.start_ns = origin.start_ns
         else:
             self.start_time = time.time()
+            self.start_ns = now_ns
             
-        self.first_seen_str = datetime.fromtimestamp(self.start_time).strftime("%Y-%m-%d %H:%M:%S")
-        self.last_seen_time = time.time()
+        self._first_seen_str = None # Wird erst beim JSON-Export formatiert (siehe first_seen_str)
+        self.last_seen_ns = now_ns
+        self._dur_cache = (0, "00:00") # (volle Sekunden, Text) der letzten Dauer-Anzeige
         
         # Tracking-Metriken
         self.missing_frames = 0 # Zähler für Occlusion (Verdeckung)
         self.active = True      # True = Im aktuellen Frame sichtbar
 
-    def update(self, box):
+    @staticmethod
+    def _centroid(box):
+        x, y, w, h = box
+        return np.array((x + w / 2, y + h / 2), np.float32)
+
+    @property
+    def first_seen_str(self):
+        """Startzeit als Text, einmalig formatiert (nur beim JSON-Export benötigt)."""
+        if self._first_seen_str is None:
+            self._first_seen_str = datetime.fromtimestamp(self.start_time).strftime("%Y-%m-%d %H:%M:%S")
+        return self._first_seen_str
+
+    def update(self, box, now_ns):
         """Wird aufgerufen, wenn das Objekt im aktuellen Frame wiedererkannt wurde."""
         self.box = box
-        self.last_seen_time = time.time()
+        self.centroid = self._centroid(box)
+        self.last_seen_ns = now_ns
         self.missing_frames = 0
         self.active = True
 
@@ -68,12 +141,114 @@ class TrackedObject:
         self.missing_frames += 1
         self.active = False
     
-    def get_duration_string(self):
-        """Hilfsfunktion für die GUI-Anzeige."""
-        elapsed = time.time() - self.start_time
-        minutes = int(elapsed // 60)
-        seconds = int(elapsed % 60)
-        return f"{minutes:02}:{seconds:02}"
+    def get_duration_string(self, now_ns=None):
+        """Hilfsfunktion für die GUI-Anzeige. Der Text ändert sich nur sekündlich und wird gecacht."""
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        elapsed = (now_ns - self.start_ns) // 1_000_000_000
+        if elapsed != self._dur_cache[0]:
+            minutes, seconds = divmod(elapsed, 60)
+            self._dur_cache = (elapsed, f"{minutes:02}:{seconds:02}")
+        return self._dur_cache[1]
+
+class EntityTable:
+    """
+    Structure-of-Arrays-Spiegel der aktiven Objekte.
+    Parallele Arrays (boxes, active, missing_frames, labels) + Listen (uids, entities) mit gleicher
+    Zeilenreihenfolge, dazu ein Index uid -> Zeile. Der Tracker pflegt die Tabelle
+    inkrementell (add/update/mark_missing/remove), statt sie jeden Frame neu aufzubauen.
+    Die Zeilenreihenfolge entspricht der Einfügereihenfolge (Löschen kompaktiert).
+    """
+    def __init__(self, capacity=32):
+        self._boxes = np.zeros((capacity, 4), np.int32) # (x, y, w, h) pro Zeile
+        self._active = np.zeros(capacity, np.bool_)     # True = im aktuellen Frame sichtbar
+        self._missing = np.zeros(capacity, np.int32)    # Frames in Folge nicht gesehen
+        self._labels = np.empty(capacity, object)
+        self.uids = []
+        self.entities = [] # Zugehörige TrackedObjects (für Zeiten/Details)
+        self._uid_to_row = {}
+        self.n = 0
+
+    @property
+    def boxes(self):
+        return self._boxes[:self.n]
+
+    @property
+    def active(self):
+        return self._active[:self.n]
+
+    @property
+    def missing_frames(self):
+        return self._missing[:self.n]
+
+    @property
+    def labels(self):
+        return self._labels[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def centroids(self):
+        """Mittelpunkte aller Zeilen als float32 (N,2), in einem Schritt berechnet."""
+        boxes = self.boxes
+        return (boxes[:, :2] + boxes[:, 2:] / 2).astype(np.float32)
+
+    def add(self, entity):
+        """Hängt ein Objekt als neue Zeile an (Arrays wachsen bei Bedarf auf doppelte Größe)."""
+        if self.n == len(self._boxes):
+            capacity = 2 * len(self._boxes)
+            for name in ('_boxes', '_active', '_missing', '_labels'):
+                old = getattr(self, name)
+                grown = np.zeros((capacity,) + old.shape[1:], old.dtype)
+                grown[:self.n] = old[:self.n]
+                setattr(self, name, grown)
+        row = self.n
+        self._boxes[row] = entity.box
+        self._active[row] = entity.active
+        self._missing[row] = entity.missing_frames
+        self._labels[row] = entity.label
+        self.uids.append(entity.uid)
+        self.entities.append(entity)
+        self._uid_to_row[entity.uid] = row
+        self.n += 1
+
+    def update(self, uid, box):
+        """Objekt wurde wiedererkannt: Box übernehmen, Zeile aktiv."""
+        row = self._uid_to_row[uid]
+        self._boxes[row] = box
+        self._active[row] = True
+        self._missing[row] = 0
+
+    def row(self, uid):
+        return self._uid_to_row[uid]
+
+    def mark_missing(self, mask):
+        """Zeilen mit mask == True fehlen im aktuellen Frame (ein Schritt für alle)."""
+        self._active[:self.n][mask] = False
+        self._missing[:self.n][mask] += 1
+
+    def remove(self, uid):
+        """Entfernt die Zeile eines Objekts. Nachfolgende Zeilen rücken auf (Reihenfolge bleibt)."""
+        row = self._uid_to_row.pop(uid)
+        n = self.n
+        self._boxes[row:n - 1] = self._boxes[row + 1:n]
+        self._active[row:n - 1] = self._active[row + 1:n]
+        self._missing[row:n - 1] = self._missing[row + 1:n]
+        self._labels[row:n - 1] = self._labels[row + 1:n]
+        self._labels[n - 1] = None
+        del self.uids[row]
+        del self.entities[row]
+        for moved_uid in self.uids[row:]:
+            self._uid_to_row[moved_uid] -= 1
+        self.n -= 1
+
+    def largest_active(self):
+        """Zielauswahl (Heuristik: Größtes sichtbares Objekt = Nächstes Objekt) oder None."""
+        if not self.n: return None
+        boxes = self.boxes
+        areas = boxes[:, 2] * boxes[:, 3] * self.active
+        row = int(np.argmax(areas))
+        return self.entities[row] if areas[row] > 0 else None
 
 class ObjectManager:
     """
@@ -83,15 +258,31 @@ class ObjectManager:
     def __init__(self, json_path):
         self.json_path = json_path
         self.entities = {} # Aktive Objekte {uid: TrackedObject}
-        self.history = {}  # "Friedhof" / Gedächtnis für kurzzeitig verlorene Objekte
+        # "Friedhof" / Gedächtnis für kurzzeitig verlorene Objekte, nach Label gruppiert
+        # {label: {uid: TrackedObject}} -> Wiederbelebung prüft nur Kandidaten mit gleichem Label
+        self.history_by_label = {}
+        # Ablaufzeiten der History-Einträge als Min-Heap [(expire_ns, uid, label)]:
+        # Die Garbage Collection prüft nur die Spitze statt die gesamte History.
+        self._history_expiry = []
         self.next_uid = 1  # Auto-Increment ID
+        self.table = EntityTable() # SoA-Spiegel von self.entities (Ausgabe von process)
         
         # Performance: JSON nicht jeden Frame schreiben
-        self.last_json_write = 0
-        self.write_interval = 2.0  # Nur alle 2 Sekunden schreiben
+        self.last_json_write_ns = 0
+        self.write_interval_ns = 2_000_000_000  # Nur alle 2 Sekunden schreiben
+        self.history_duration_ns = int(HISTORY_DURATION * 1e9)
+        # Dirty-Flag: Nur schreiben, wenn sich IDs oder Status (LIVE/MEMORY) geändert haben
+        # oder eine exportierte Dauer (sekundengenau) weitergelaufen ist.
+        self._dirty = False
+        self._last_durations = [] # Dauer-Texte des letzten Exports (gleiche Reihenfolge wie entities)
         
         self.ensure_json_exists()
 
+        # Schreib-Thread: Hauptschleife übergibt nur die Daten, Disk-I/O läuft im Hintergrund.
+        # Größe 1: Ist der Thread noch beschäftigt, ersetzt der neueste Stand den wartenden.
+        self._json_q = queue.Queue(maxsize=1)
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+
     def ensure_json_exists(self):
         """Initialisiert die Log-Datei, falls nicht vorhanden."""
         folder = os.path.dirname(self.json_path)
@@ -101,160 +292,243 @@ class ObjectManager:
             self.write_json([])
 
     def write_json(self, data_list):
-        """Schreibt Tracking-Daten persistent auf die Disk."""
+        """
+        Schreibt Tracking-Daten persistent auf die Disk.
+        Atomar: Erst in eine Temp-Datei, dann per os.replace umbenennen. Leser sehen
+        so nie eine halb geschriebene Datei (auch nicht bei Absturz während des Schreibens).
+        """
         try:
-            with open(self.json_path, 'w') as f:
-                json.dump(data_list, f, indent=4)
-            os.chmod(self.json_path, 0o666) # Lese-/Schreibrechte für alle User (Debugging)
+            data = json.dumps(data_list, separators=(',', ':')).encode() # Kompakt: kleiner und schneller als indent
+            tmp_path = self.json_path + '.tmp'
+            with open(tmp_path, 'wb', buffering=0) as f: # Ein einziger write()-Aufruf
+                # Rechte am Handle setzen: os.replace übernimmt die Rechte der Temp-Datei
+                os.fchmod(f.fileno(), 0o666) # Lese-/Schreibrechte für alle User (Debugging)
+                f.write(data)
+            os.replace(tmp_path, self.json_path)
         except Exception as e:
             print(f"JSON Fehler: {e}")
 
-    def is_in_kill_zone(self, box, img_w, img_h):
+    def _writer_loop(self):
+        """Hintergrund-Thread: Schreibt übergebene Daten nacheinander auf die Disk."""
+        while True:
+            self.write_json(self._json_q.get())
+
+    def _queue_json(self, data_list):
+        """Übergibt Daten an den Schreib-Thread, ohne zu blockieren (neuester Stand gewinnt)."""
+        try:
+            self._json_q.put_nowait(data_list)
+        except queue.Full:
+            try: self._json_q.get_nowait() # Veralteten Stand verwerfen
+            except queue.Empty: pass       # Thread war schneller
+            self._json_q.put_nowait(data_list)
+
+    def _add_history(self, entity):
+        """Legt ein Objekt im Gedächtnis ab (Bucket seines Labels)."""
+        self.history_by_label.setdefault(entity.label, {})[entity.uid] = entity
+        heapq.heappush(self._history_expiry,
+                       (entity.last_seen_ns + self.history_duration_ns, entity.uid, entity.label))
+
+    def _pop_history(self, uid, label):
+        """Entfernt ein Objekt aus dem Gedächtnis und gibt es zurück."""
+        bucket = self.history_by_label[label]
+        entity = bucket.pop(uid)
+        if not bucket:
+            del self.history_by_label[label]
+        return entity
+
+    def _nearest_in_history(self, label, centroid, trees):
         """
-        Prüft, ob ein Objekt den Bildrand berührt.
-        Rand-Objekte werden oft falsch erkannt oder verschwinden gleich -> Löschen.
+        Sucht im History-Bucket des Labels das nächste Objekt innerhalb von RECOVERY_DISTANCE.
+        Große Buckets nutzen einen KD-Baum (einmal pro Frame gebaut, in `trees` gecacht),
+        kleine eine lineare, vektorisierte Suche.
+
+        Returns:
+            uid des besten Kandidaten oder None.
         """
-        x, y, w, h = box
-        if x < BORDER_MARGIN or y < BORDER_MARGIN: return True
-        if (x + w) > (img_w - BORDER_MARGIN) or (y + h) > (img_h - BORDER_MARGIN): return True
-        return False
+        bucket = self.history_by_label.get(label)
+        if not bucket:
+            return None
+
+        if cKDTree is not None and (label in trees or len(bucket) > KDTREE_MIN_BUCKET):
+            if label not in trees:
+                h_uids = list(bucket.keys())
+                H = np.array([bucket[h_uid].centroid for h_uid in h_uids])
+                trees[label] = (cKDTree(H), H, h_uids)
+            tree, H, h_uids = trees[label]
+            # Kandidaten im Radius, nur noch vorhandene (wiederbelebte sind schon entfernt)
+            idxs = [idx for idx in sorted(tree.query_ball_point(centroid, RECOVERY_DISTANCE))
+                    if h_uids[idx] in bucket]
+            if not idxs:
+                return None
+            diff = H[idxs] - centroid
+        else:
+            h_uids = list(bucket.keys())
+            idxs = range(len(h_uids))
+            diff = np.array([bucket[h_uid].centroid for h_uid in h_uids]) - centroid  # (H,2)
+
+        h_dist2 = np.einsum('ij,ij->i', diff, diff)
+        best = int(np.argmin(h_dist2))
+        return h_uids[idxs[best]] if h_dist2[best] < RECOVERY_DISTANCE_SQ else None
 
-    def calculate_distance(self, box1, box2):
+    def kill_zone_mask(self, boxes, img_w, img_h):
         """
-        Berechnet die Distanz zwischen zwei Objekt-Mittelpunkten (Zentroiden).
-        Grundlage für die Entscheidung "Ist Objekt A == Objekt B?".
+        Prüft für alle Boxen (N,4) in einem Schritt, ob sie den Bildrand berühren.
+        Rand-Objekte werden oft falsch erkannt oder verschwinden gleich -> Löschen.
         """
-        c1_x, c1_y = box1[0] + box1[2]/2, box1[1] + box1[3]/2
-        c2_x, c2_y = box2[0] + box2[2]/2, box2[1] + box2[3]/2
-        return math.hypot(c2_x - c1_x, c2_y - c1_y)
+        x, y, w, h = boxes.T
+        return ((x < BORDER_MARGIN) | (y < BORDER_MARGIN)
+                | (x + w > img_w - BORDER_MARGIN) | (y + h > img_h - BORDER_MARGIN))
 
-    def process(self, detected_objects, img_w, img_h):
+    def process(self, boxes, labels, img_w, img_h):
         """
         Haupt-Update-Schleife des Trackers.
         Hier passiert die Magie der Daten-Assoziation.
+
+        Args:
+            boxes: Array (N,4) mit (x, y, w, h) pro Detektion.
+            labels: Liste der Klassen-Labels, parallel zu boxes.
+
+        Returns:
+            (table, target_entity): EntityTable aller aktiven Objekte und das Ziel-Objekt
+            (größtes sichtbares Objekt = nächstes Objekt) oder None.
         """
-        current_time = time.time()
+        now_ns = time.monotonic_ns() # Eine Frame-Zeit für alle Objekte (monoton, Integer)
+        # Einmalige Konvertierung in Python-Tupel (schneller Zugriff in den Schleifen)
+        det_boxes = [tuple(box) for box in boxes.tolist()]
         
         # --- 1. MATCHING VORBEREITUNG (Kostenmatrix erstellen) ---
-        # Wir berechnen ALLE möglichen Distanzen zwischen alten IDs und neuen Boxen.
-        active_uids = list(self.entities.keys())
-        matches = [] # Liste von Tupeln: (Distanz, uid, detection_index)
-
-        for uid in active_uids:
-            entity = self.entities[uid]
-            for i, obj in enumerate(detected_objects):
-                # Hard Constraint: Ein Apfel kann nicht plötzlich zur Banane werden.
-                if entity.label == obj['label']:
-                    dist = self.calculate_distance(entity.box, obj['box'])
-                    # Gating: Wenn Distanz zu groß (Sprung), ist es wohl ein anderes Objekt.
-                    if dist < MAX_TRACKING_DISTANCE:
-                        matches.append((dist, uid, i))
-        
-        # --- 2. GREEDY MATCHING ---
-        # Sortieren nach kleinster Distanz. Das naheliegendste Match gewinnt.
-        # Dies ist eine einfache, aber schnelle Alternative zum "Ungarischen Algorithmus".
-        matches.sort(key=lambda x: x[0])
-        
+        # Wir berechnen ALLE möglichen Distanzen zwischen alten IDs und neuen Boxen,
+        # als (N,M)-Matrix in einem Schritt. Quadrierte Distanzen sparen die Wurzel.
+        table = self.table
+        active_uids = list(table.uids) # Gleiche Reihenfolge wie die Tabellen-Zeilen
         matched_uids = set()
         matched_indices = set()
 
-        # Zuweisung durchführen
-        for dist, uid, i in matches:
-            if uid in matched_uids or i in matched_indices:
-                continue # Dieses Paar ist schon vergeben
-            
-            # Match akzeptiert: Objekt-Position aktualisieren
-            self.entities[uid].update(detected_objects[i]['box'])
-            matched_uids.add(uid)
-            matched_indices.add(i)
+        D = (boxes[:, :2] + boxes[:, 2:] / 2).astype(np.float32)                # (M,2)
+
+        if active_uids and det_boxes:
+            E = table.centroids()                                               # (N,2)
+            E_lbl = table.labels
+            D_lbl = np.array(labels)
+
+            diff = E[:, None, :] - D[None, :, :]
+            dist2 = np.einsum('ijk,ijk->ij', diff, diff)
+            # Hard Constraint: Ein Apfel kann nicht plötzlich zur Banane werden.
+            # Gating: Wenn Distanz zu groß (Sprung), ist es wohl ein anderes Objekt.
+            valid = (E_lbl[:, None] == D_lbl[None, :]) & (dist2 < MAX_TRACKING_DISTANCE_SQ)
+
+            # --- 2. MATCHING (Ungarischer Algorithmus bzw. Greedy) ---
+            for row, i in match_pairs(dist2, valid):
+                uid = active_uids[row]
+                # Match akzeptiert: Objekt-Position aktualisieren
+                entity = self.entities[uid]
+                if not entity.active: self._dirty = True # MEMORY -> LIVE
+                entity.update(det_boxes[i], now_ns)
+                table.update(uid, det_boxes[i])
+                matched_uids.add(uid)
+                matched_indices.add(i)
 
         # --- 3. WIEDERBELEBUNG (Recovery) & NEUERSTELLUNG ---
-        for i, obj in enumerate(detected_objects):
+        history_trees = {} # KD-Bäume pro Label, nur für diesen Frame gültig
+        for i, new_label in enumerate(labels):
             if i in matched_indices:
                 continue # Wurde bereits einem aktiven Objekt zugeordnet
 
             # Objekt konnte keinem aktiven Tracker zugeordnet werden.
             # Ist es vielleicht ein altes Objekt, das kurz verdeckt war?
-            new_box = obj['box']
-            new_label = obj['label']
-            
-            best_history_uid = None
-            min_hist_dist = RECOVERY_DISTANCE
+            new_box = det_boxes[i]
             
-            # Suche im "Gedächtnis" (History)
-            history_uids = list(self.history.keys())
-            for h_uid in history_uids:
-                h_entity = self.history[h_uid]
-                if h_entity.label != new_label: continue
-                
-                dist = self.calculate_distance(h_entity.box, new_box)
-                if dist < min_hist_dist:
-                    min_hist_dist = dist
-                    best_history_uid = h_uid
+            # Suche im "Gedächtnis" (History), nur im Bucket des gleichen Labels
+            best_history_uid = self._nearest_in_history(new_label, D[i], history_trees)
 
             if best_history_uid is not None:
                 # RE-IDENTIFICATION: Objekt wiedergefunden -> Zurück in aktive Liste
-                old_entity = self.history.pop(best_history_uid)
+                old_entity = self._pop_history(best_history_uid, new_label)
                 print(f">>> RESURRECT: ID #{best_history_uid} ({new_label}) wieder da!")
-                resurrected = TrackedObject(old_entity.uid, new_label, new_box, old_entity.start_time)
+                resurrected = TrackedObject(old_entity.uid, new_label, new_box, now_ns, origin=old_entity)
                 self.entities[best_history_uid] = resurrected
+                table.add(resurrected)
+                self._dirty = True
             else:
                 # NEW: Wirklich neues Objekt -> Neue ID vergeben
                 print(f">>> NEUES OBJEKT ID #{self.next_uid}: {new_label}")
-                self.entities[self.next_uid] = TrackedObject(self.next_uid, new_label, new_box)
+                entity = TrackedObject(self.next_uid, new_label, new_box, now_ns)
+                self.entities[self.next_uid] = entity
+                table.add(entity)
                 self.next_uid += 1
+                self._dirty = True
 
         # --- 4. AUFRÄUMEN (Lost & Kill Zone) ---
         # Was passiert mit Objekten, die im aktuellen Frame NICHT gesehen wurden?
-        codes_to_move_to_history = []
-        current_active_uids = list(self.entities.keys())
+        # Alle Entscheidungen als Masken über die SoA-Tabelle (ein Durchgang für alle Objekte)
+        missing = np.ones(len(table), np.bool_)
+        missing[[table.row(uid) for uid in matched_uids]] = False # Alles gut, wurde geupdatet
 
-        for uid in current_active_uids:
-            if uid in matched_uids:
-                continue # Alles gut, wurde geupdatet
+        # Objekt fehlt im aktuellen Bild
+        if (missing & table.active).any(): self._dirty = True # LIVE -> MEMORY
+        table.mark_missing(missing)
+        missing_rows = np.flatnonzero(missing).tolist()
+        for row in missing_rows:
+            table.entities[row].mark_missing()
 
-            # Objekt fehlt im aktuellen Bild
-            entity = self.entities[uid]
-            entity.mark_missing()
-            
-            # Entscheidung: Löschen oder Merken?
-            if self.is_in_kill_zone(entity.box, img_w, img_h):
-                # Wenn es am Rand verschwindet, gehen wir davon aus, dass es weg ist.
+        # Entscheidung: Löschen oder Merken?
+        # - Wenn es am Rand verschwindet, gehen wir davon aus, dass es weg ist.
+        # - Wenn es zu lange fehlt (Timeout), schieben wir es ins Langzeit-Gedächtnis.
+        kill = missing & self.kill_zone_mask(table.boxes, img_w, img_h)
+        timeout = missing & ~kill & (table.missing_frames > MEMORY_TOLERANCE)
+
+        to_kill = []    # Am Rand verschwunden -> löschen
+        to_history = [] # Timeout -> ins Gedächtnis
+        for row in np.flatnonzero(kill | timeout).tolist():
+            uid = table.uids[row]
+            if kill[row]:
                 print(f"<<< RAND-KILL: ID #{uid}")
-                codes_to_move_to_history.append((uid, False)) # False = nicht in History speichern
-            elif entity.missing_frames > MEMORY_TOLERANCE:
-                # Wenn es zu lange fehlt (Timeout), schieben wir es ins Langzeit-Gedächtnis.
+                to_kill.append(uid)
+            else:
                 print(f"<<< TIMEOUT: ID #{uid}")
-                codes_to_move_to_history.append((uid, True))  # True = in History speichern
+                to_history.append(uid)
 
         # Verschieben/Löschen durchführen
-        for uid, keep_in_history in codes_to_move_to_history:
-            if keep_in_history:
-                self.history[uid] = self.entities[uid]
+        for uid in to_history:
+            self._add_history(self.entities.pop(uid))
+            table.remove(uid)
+        for uid in to_kill:
             del self.entities[uid]
+            table.remove(uid)
+        if to_history or to_kill: self._dirty = True
 
         # --- 5. GARBAGE COLLECTION ---
         # Alte Einträge aus der History löschen, um Speicherüberlauf zu verhindern
-        history_to_delete = []
-        for uid, entity in self.history.items():
-            if (current_time - entity.last_seen_time) > HISTORY_DURATION:
-                history_to_delete.append(uid)
-        for uid in history_to_delete:
-            del self.history[uid]
+        # Nur abgelaufene Einträge werden angefasst (Heap-Spitze). Einträge von Objekten,
+        # die inzwischen wiederbelebt wurden, sind veraltet und werden nur verworfen.
+        expiry = self._history_expiry
+        while expiry and expiry[0][0] < now_ns:
+            _, uid, label = heapq.heappop(expiry)
+            entity = self.history_by_label.get(label, {}).get(uid)
+            if entity is not None and (now_ns - entity.last_seen_ns) > self.history_duration_ns:
+                self._pop_history(uid, label)
 
         # --- 6. JSON EXPORT ---
         # Status für Web-Interface oder Logs schreiben
-        if current_time - self.last_json_write > self.write_interval:
-            json_output = []
-            for uid, entity in self.entities.items():
-                json_output.append({
-                    "internal_id": uid,
-                    "class": entity.label,
-                    "duration": entity.get_duration_string(),
-                    "timestamp": entity.first_seen_str,
-                    "status": "LIVE" if entity.active else "MEMORY"
-                })
-            self.write_json(json_output)
-            self.last_json_write = current_time
+        if now_ns - self.last_json_write_ns > self.write_interval_ns:
+            # Dauer-Texte sind pro Sekunde gecacht, der Vergleich kostet kaum etwas
+            durations = [entity.get_duration_string(now_ns) for entity in self.entities.values()]
+            if durations != self._last_durations: self._dirty = True
+
+            if self._dirty:
+                json_output = []
+                for (uid, entity), duration in zip(self.entities.items(), durations):
+                    json_output.append({
+                        "internal_id": uid,
+                        "class": entity.label,
+                        "duration": duration,
+                        "timestamp": entity.first_seen_str,
+                        "status": "LIVE" if entity.active else "MEMORY"
+                    })
+                self._queue_json(json_output)
+                self.last_json_write_ns = now_ns
+                self._last_durations = durations
+                self._dirty = False
         
-        return self.entities
+        # --- 7. AUSGABE (SoA) & ZIELAUSWAHL ---
+        return table, table.largest_active()
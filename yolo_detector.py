@@ -9,8 +9,11 @@ Nimmt ein Rohbild entgegen und liefert strukturierte Objektdaten zurück.
 
 Funktionalität:
 1. Lädt das Modell (bevorzugt TensorRT Engine Files für Jetson-Performance).
-2. Führt die Inferenz durch.
-3. Post-Processing:
+2. Pre-Processing: Letterbox direkt in einen persistenten, page-locked (pinned)
+   Host-Puffer, von dort asynchroner Upload in persistente GPU-Tensoren
+   (Format-Umwandlung in-place auf der GPU, keine Allokation pro Frame).
+3. Führt die Inferenz durch.
+4. Post-Processing:
    - Filtert irrelevante Klassen (nur Zielobjekte).
    - Filtert Artefakte am Bildrand oder zu kleine Objekte (Rauschen).
 """
@@ -18,8 +21,15 @@ Funktionalität:
 from ultralytics import YOLO
 import cv2
 import numpy as np
+import torch
 import config
 
+LETTERBOX_COLOR = 114 # Grauwert für den Rand (wie Ultralytics)
+
+# Whitelist-Ansatz: Nur definierte Objekte werden weiterverarbeitet.
+# Trick: 'sports ball' wird oft für runde Objekte (Papierkugel) genutzt.
+TARGET_CLASSES = frozenset({"bottle", "cup", "can", "sports ball", "orange", "apple"})
+
 class YoloDetector:
     def __init__(self):
         """Initialisiert das Modell beim Start, um Latenz im Loop zu vermeiden."""
@@ -28,66 +38,141 @@ class YoloDetector:
         self.model = YOLO(config.MODEL_PATH, task='detect')
         print("Modell geladen.")
 
+        # Klassen-Namen einmalig normalisieren (klein geschrieben): Labels werden nur noch nachgeschlagen
+        self.names = {i: n.lower() for i, n in self.model.names.items()} # {cls_id: label}
+        # Klassen-IDs sind fix: Whitelist einmalig in IDs übersetzen (statt Label-Vergleich pro Box)
+        self.target_ids = frozenset(i for i, n in self.names.items() if n in TARGET_CLASSES)
+        self._target_id_array = np.array(sorted(self.target_ids), np.int32) # Für np.isin
+
+        self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        self.imgsz = config.MODEL_IMGSZ
+
+        # Persistenter Host-Puffer (ein Slot pro Batch-Eintrag) im Format (B, H, W, RGB).
+        # Page-locked Speicher erlaubt DMA-Upload ohne Zwischenkopie, und es wird
+        # nicht mehr pro Frame ein neues Array allokiert.
+        host = torch.full((config.BATCH_SIZE, self.imgsz, self.imgsz, 3), LETTERBOX_COLOR, dtype=torch.uint8)
+        self._host = host.pin_memory() if self.device.type == "cuda" else host
+        self._host_np = self._host.numpy() # Numpy-Sicht auf denselben Speicher
+
+        # Persistente Tensoren auf dem Device: Upload-Ziel (uint8, BHWC) und Modell-Eingabe (BCHW).
+        # Die Eingabe hat direkt den Datentyp der Engine (fp16), sonst konvertiert Ultralytics erneut.
+        fp16 = self.device.type == "cuda" and config.MODEL_PRECISION == "fp16"
+        self._upload = torch.empty_like(self._host, device=self.device)
+        self._input = torch.empty((config.BATCH_SIZE, 3, self.imgsz, self.imgsz),
+                                  dtype=torch.float16 if fp16 else torch.float32, device=self.device)
+        self._resized = None  # Zwischenpuffer für cv2.resize
+        self._geometry = None # (frame_shape, ratio, pad_x, pad_y), wird pro Auflösung einmal berechnet
+
+        # Vorallokierte Ausgabe-Puffer (ein Slot pro Batch-Eintrag). detect() liefert Sichten
+        # darauf zurück, pro Frame entstehen so keine neuen Arrays/Dictionaries.
+        self._boxes_out = np.zeros((config.BATCH_SIZE, config.MAX_DETECTIONS, 4), np.int32)
+        self._confs_out = np.zeros((config.BATCH_SIZE, config.MAX_DETECTIONS), np.float32)
+        self._labels_out = [[''] * config.MAX_DETECTIONS for _ in range(config.BATCH_SIZE)]
+
     def detect(self, frame):
         """
         Führt die Objekterkennung auf einem einzelnen Frame durch.
-        
+        Die Boxen liegen in Pixeln des übergebenen Frames.
+
         Returns:
-            Liste von Dictionaries: [{'label': str, 'box': (x,y,w,h), 'conf': float}, ...]
+            Tupel (boxes, labels, confs): boxes np.int32 (N,4) als (x,y,w,h),
+            labels [str, ...], confs np.float32 (N,).
+            Die Arrays sind Sichten auf interne Puffer und nur bis zum nächsten
+            Aufruf gültig (bei Bedarf kopieren).
+        """
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
         """
-        img_h, img_w = frame.shape[:2]
+        Führt die Objekterkennung für mehrere Frames in EINEM Engine-Aufruf durch.
+        Der Kernel-Launch-Overhead wird so auf alle Frames des Batches verteilt.
+        Maximal config.BATCH_SIZE Frames (Größe des Host-Puffers).
         
+        Returns:
+            Liste (ein Eintrag pro Frame, gleiche Reihenfolge) von (boxes, labels, confs)-Tupeln.
+        """
+        if not frames: return []
+
+        # Pre-Processing in den Pinned-Puffer, dann asynchroner Upload
+        n = len(frames)
+        for slot, frame in enumerate(frames):
+            self._letterbox(frame, slot)
+        self._upload[:n].copy_(self._host[:n], non_blocking=True)
+        batch = self._input[:n]
+        batch.copy_(self._upload[:n].permute(0, 3, 1, 2)).mul_(1 / 255.0) # BHWC uint8 -> BCHW float [0, 1]
+
         # Inferenz-Schritt
         # verbose=False unterdrückt Konsolenausgaben für Performance
-        results = self.model(frame, verbose=False, conf=config.CONFIDENCE_THRESHOLD)
-        detected_objects = []
-        
-        if not results: return []
-        
-        result = results[0] # Wir verarbeiten nur das erste Bild (Batch Size 1)
-        
-        # Iteration über alle gefundenen Bounding Boxes
-        for box in result.boxes:
-            # Koordinaten extrahieren (xyxy Format -> xywh Format)
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            
-            x = int(x1)
-            y = int(y1)
-            w = int(x2 - x1)
-            h = int(y2 - y1)
-            
-            conf = float(box.conf[0])
-            cls_id = int(box.cls[0])
-            
-            # Klassen-Label auflösen (z.B. 0 -> "person")
-            if hasattr(result, 'names'):
-                label = result.names[cls_id]
-            else:
-                label = "unknown"
-
-            # ---------- Semantischer Filter ----------
-            # Whitelist-Ansatz: Nur definierte Objekte werden weiterverarbeitet.
-            # Trick: 'sports ball' wird oft für runde Objekte (Papierkugel) genutzt.
-            TARGET_CLASSES = ["bottle", "cup", "can", "sports ball", "orange", "apple"]
-
-            if label.lower() not in TARGET_CLASSES:
-                continue
-
-            # ---------- Geometrische Filter ----------
-            # 1. Rauschunterdrückung: Zu kleine Boxen ignorieren
-            if w < 20 or h < 20:
-                continue
-
-            # 2. Rand-Unterdrückung: Objekte, die den Bildrand berühren,
-            # sind oft unvollständig und führen zu schlechten Tracking-Ergebnissen.
-            margin = 5
-            if x < margin or y < margin or (x + w) > (img_w - margin) or (y + h) > (img_h - margin):
-                continue
-            
-            detected_objects.append({
-                "label": label,
-                "box": (x, y, w, h),
-                "conf": conf
-            })
-            
-        return detected_objects
+        # max_det begrenzt die Anzahl Boxen, die NMS und Post-Processing durchlaufen
+        # classes: Nicht-Zielklassen schon in der NMS verwerfen
+        results = self.model(batch, verbose=False, conf=config.CONFIDENCE_THRESHOLD,
+                             max_det=config.MAX_DETECTIONS, classes=list(self.target_ids))
+        if not results: return [self._output(slot, 0) for slot in range(len(frames))]
+
+        return [self._postprocess(result, frame.shape[:2], slot)
+                for slot, (result, frame) in enumerate(zip(results, frames))]
+
+    def _letterbox(self, frame, slot):
+        """
+        Skaliert den Frame seitenverhältnistreu in den Host-Puffer (Slot `slot`) und
+        konvertiert dabei BGR -> RGB. Der graue Rand bleibt aus der Initialisierung stehen.
+        """
+        shape = frame.shape[:2]
+        if self._geometry is None or self._geometry[0] != shape:
+            h, w = shape
+            ratio = min(self.imgsz / h, self.imgsz / w)
+            new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+            pad_x = int(round((self.imgsz - new_w) / 2 - 0.1))
+            pad_y = int(round((self.imgsz - new_h) / 2 - 0.1))
+            self._geometry = (shape, ratio, pad_x, pad_y)
+            self._resized = np.empty((new_h, new_w, 3), np.uint8)
+            self._host_np[:] = LETTERBOX_COLOR
+
+        _, _, pad_x, pad_y = self._geometry
+        new_h, new_w = self._resized.shape[:2]
+        cv2.resize(frame, (new_w, new_h), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        self._host_np[slot, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = self._resized[..., ::-1]
+
+    def _output(self, slot, n):
+        """Liefert die ersten n Einträge des Ausgabe-Slots."""
+        return self._boxes_out[slot, :n], self._labels_out[slot][:n], self._confs_out[slot, :n]
+
+    def _postprocess(self, result, shape, slot):
+        """Filtert die Roh-Ergebnisse eines einzelnen Frames (Klasse, Größe, Bildrand)."""
+        img_h, img_w = shape
+        _, ratio, pad_x, pad_y = self._geometry
+
+        if not len(result.boxes): return self._output(slot, 0)
+
+        # Ein einziger Device->Host-Transfer pro Tensor statt .cpu() pro Box
+        xyxy = result.boxes.xyxy.cpu().numpy()
+        confs = result.boxes.conf.cpu().numpy()
+        cls_ids = result.boxes.cls.cpu().numpy().astype(np.int32)
+
+        # Letterbox rückgängig machen (Engine-Koordinaten -> Frame-Koordinaten)
+        xyxy = (xyxy - (pad_x, pad_y, pad_x, pad_y)) / ratio
+        # xyxy Format -> xywh Format in-place, dann EINE Konvertierung (int() schneidet ab wie astype)
+        xyxy[:, 2:] -= xyxy[:, :2]
+        xywh = xyxy.astype(np.int32)
+        x, y, w, h = xywh.T
+
+        # Alle Filter in einer einzigen Masken-Auswertung:
+        # - Semantisch: Nur Klassen-IDs aus der Whitelist (TARGET_CLASSES)
+        # - Rauschunterdrückung: Zu kleine Boxen ignorieren
+        # - Rand-Unterdrückung: Objekte, die den Bildrand berühren,
+        #   sind oft unvollständig und führen zu schlechten Tracking-Ergebnissen.
+        margin = 5
+        keep = (np.isin(cls_ids, self._target_id_array)
+                & (w >= 20) & (h >= 20)
+                & (x >= margin) & (y >= margin) & (x + w <= img_w - margin) & (y + h <= img_h - margin))
+
+        # Nur die überlebenden Zeilen in die (vorallokierten) Ausgabe-Puffer übernehmen
+        rows = np.flatnonzero(keep)[:config.MAX_DETECTIONS]
+        n = len(rows)
+        self._boxes_out[slot, :n] = xywh[rows]
+        self._confs_out[slot, :n] = confs[rows]
+        # Klassen-Label auflösen (z.B. 39 -> "bottle"), nur für die überlebenden Zeilen
+        names = self.names
+        self._labels_out[slot][:n] = [names[cls_id] for cls_id in cls_ids[rows].tolist()]
+
+        return self._output(slot, n)